@@ -7,12 +7,12 @@ on the citation matching logic or regenerating data.json after fixing find_citat
 Usage:
     python3 scripts/assemble_data_json.py
     python3 scripts/assemble_data_json.py --input path/to/extraction_raw.json
+    python3 scripts/assemble_data_json.py --no-cache  # ignore cached citation results
 """
 
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
 
@@ -26,6 +26,8 @@ sys.path.insert(0, str(SCRIPT_DIR))
 from extract_schema import (
     flatten_schema, parse_extraction_response, resolve_citations, assemble_data_json,
 )
+from find_citation import set_result_cache
+from json_io import read_json, write_json
 
 
 def main():
@@ -35,15 +37,22 @@ def main():
         default=str(DATA_DIR / "extraction_raw.json"),
         help="Path to raw extraction JSON (default: public/data/extraction_raw.json)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every citation instead of reusing cached find_citation results",
+    )
     args = parser.parse_args()
 
+    if args.no_cache:
+        set_result_cache(False)
+
     input_path = Path(args.input)
     if not input_path.exists():
         print(f"Error: {input_path} not found. Run extract_schema.py first.")
         sys.exit(1)
 
-    with open(input_path) as f:
-        response_text = f.read()
+    response_text = input_path.read_text()
 
     extractions = parse_extraction_response(response_text)
     print(f"Loaded {len(extractions)} field extractions")
@@ -53,13 +62,11 @@ def main():
         print(f"Error: {index_path} not found. Run batch_parse.py first.")
         sys.exit(1)
 
-    with open(index_path) as f:
-        sources = json.load(f)
+    sources = read_json(index_path)
     print(f"Loaded {len(sources)} sources")
 
     # Load schema
-    with open(SCHEMA_PATH) as f:
-        schema = json.load(f)
+    schema = read_json(SCHEMA_PATH)
     print()
 
     print("Resolving citations...")
@@ -71,8 +78,7 @@ def main():
 
     data = assemble_data_json(sources, resolved, schema)
     output_path = DATA_DIR / "data.json"
-    with open(output_path, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json(output_path, data, canonical=True)
     print(f"Wrote {output_path} with {len(data['sources'])} sources and {len(data['fields'])} fields")
 
 
@@ -11,17 +11,25 @@ Usage:
 
 from __future__ import annotations
 
-import json
 import os
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Reuse the core functions from parse_with_bboxes.py
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 from parse_with_bboxes import get_api_key, upload_file, parse_and_get_raw_result
+from json_io import HAVE_ORJSON, read_json, write_json
+from find_citation import BlockTable, blocks_sidecar_path, write_blocks_sidecar
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "public" / "data"
 SKIP_FILES = {"form-a.pdf", "form-b.pdf"}
@@ -33,65 +41,243 @@ REDUCTO_EXTS = {".txt", ".csv", ".docx", ".xlsx"}  # Non-PDF files sent to Reduc
 DIRECT_MD_EXTS = {".md"}  # Markdown files used directly (skip Reducto)
 ALL_EXTS = PDF_EXTS | REDUCTO_EXTS | DIRECT_MD_EXTS
 
+# Reducto calls are network-bound, so run a few in parallel under a rate limit
+MAX_WORKERS = 3
+REQUESTS_PER_SECOND = 5
+
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
 
 def slugify(filename: str) -> str:
     """Convert a filename to a URL-safe slug."""
     # Strip any known extension
     name = filename
-    for ext in ALL_EXTS:
-        if name.lower().endswith(ext):
-            name = name[: -len(ext)]
-            break
-    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    ext = Path(filename).suffix.lower()
+    if ext in ALL_EXTS:
+        name = name[: -len(ext)]
+    slug = _SLUG_RE.sub("-", name.lower()).strip("-")
     return slug
 
 
-def extract_markdown(reducto_data: dict) -> str:
-    """Extract markdown content from Reducto JSON result."""
+def walk_reducto(
+    reducto_data: dict, with_blocks: bool = True
+) -> tuple[str, int, BlockTable | None]:
+    """Extract markdown, page count and citation blocks from a Reducto result.
+
+    Visits every chunk and block once. The page count comes from
+    usage.num_pages, falling back to the highest bbox page seen. With
+    ``with_blocks=False`` the blocks are not normalized into a BlockTable
+    and None is returned in its place.
+    """
     result = reducto_data.get("result", reducto_data)
-    chunks = result.get("chunks", [])
     parts = []
-    for chunk in chunks:
+    max_page = 0
+    table = BlockTable() if with_blocks else None
+    for chunk in result.get("chunks", []):
         content = chunk.get("content", "")
         if content:
             parts.append(content)
-    return "\n\n".join(parts)
-
-
-def get_page_count(reducto_data: dict) -> int:
-    """Get page count from Reducto JSON."""
-    # Try usage.num_pages first
-    num_pages = reducto_data.get("usage", {}).get("num_pages")
-    if num_pages:
-        return num_pages
-    # Fallback: find max page number in blocks
-    result = reducto_data.get("result", reducto_data)
-    max_page = 0
-    for chunk in result.get("chunks", []):
         for block in chunk.get("blocks", []):
-            bbox = block.get("bbox", {})
-            page = bbox.get("page", 0)
+            page = block.get("bbox", {}).get("page", 0)
             if page > max_page:
                 max_page = page
-    return max_page or 1
+            if table is not None:
+                table.add(block)
+
+    page_count = reducto_data.get("usage", {}).get("num_pages") or max_page or 1
+    return "\n\n".join(parts), page_count, table
+
+
+def read_reducto_file(json_path: Path) -> tuple[str, int]:
+    """Get markdown and page count from a saved Reducto JSON in one pass.
+
+    Parses the whole file with orjson when available (fastest). Otherwise
+    streams it with ijson instead of loading the whole response, or falls back
+    to the standard library.
+    """
+    if HAVE_ORJSON or ijson is None:
+        md_content, page_count, _ = walk_reducto(read_json(json_path), with_blocks=False)
+        return md_content, page_count
+
+    parts = []
+    num_pages = None
+    max_page = 0
+    with open(json_path, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == "usage.num_pages":
+                num_pages = value
+            elif prefix in ("result.chunks.item.content", "chunks.item.content"):
+                if value:
+                    parts.append(value)
+            elif prefix in ("result.chunks.item.blocks.item.bbox.page", "chunks.item.blocks.item.bbox.page"):
+                if value and value > max_page:
+                    max_page = value
+    return "\n\n".join(parts), int(num_pages or max_page or 1)
+
+
+def _write_compact(slug: str, table: BlockTable, tag: str) -> None:
+    """Write the {slug}.blocks.msgpack sidecar find_citation.py loads instead of the JSON.
+
+    Holds only the filtered, pre-normalized blocks citation matching needs.
+    Skipped silently if msgpack is not installed.
+    """
+    if write_blocks_sidecar(slug, table):
+        print(f"{tag} Saved {blocks_sidecar_path(slug).name} ({len(table)} blocks)")
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write content to path unless the file already holds exactly that.
+
+    Leaves unchanged files (and their mtimes) alone on re-runs. Returns True
+    if the file was written.
+    """
+    data = content.encode()
+    if path.exists() and path.stat().st_size == len(data) and _file_equals(path, data):
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def _file_equals(path: Path, data: bytes, block_size: int = 1 << 20) -> bool:
+    """Compare a file against data block by block, without reading it whole."""
+    view = memoryview(data)
+    with open(path, "rb") as f:
+        for start in range(0, len(data), block_size):
+            if f.read(block_size) != view[start:start + block_size]:
+                return False
+    return True
+
+
+def _compact_is_fresh(slug: str, json_path: Path) -> bool:
+    """Whether the blocks sidecar exists and is newer than the Reducto JSON."""
+    sidecar = blocks_sidecar_path(slug)
+    return sidecar.exists() and sidecar.stat().st_mtime >= json_path.stat().st_mtime
+
+
+class RateLimiter:
+    """Token bucket that caps how often new Reducto jobs are started.
+
+    Holds up to ``rate`` tokens, refilled continuously at ``rate`` tokens per
+    second. ``acquire()`` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _process_one(file_path: Path, api_key: str | None, limiter: RateLimiter) -> dict | None:
+    """Parse (or load) a single file and return its sources_index entry.
+
+    Returns None if the Reducto call failed; the error is logged.
+    """
+    ext = file_path.suffix.lower()
+    slug = slugify(file_path.name)
+    json_path = DATA_DIR / f"{slug}.reducto.json"
+    md_path = DATA_DIR / f"{slug}.md"
+    display_name = file_path.stem
+    tag = f"[{file_path.name}]"
+
+    if ext in DIRECT_MD_EXTS:
+        # Markdown files: use directly, no Reducto needed
+        print(f"{tag} Using markdown file directly (no Reducto)")
+
+        # Copy/symlink to slug-based name if different
+        with open(file_path) as f:
+            md_content = f.read()
+        if md_path.exists() and md_path.resolve() == file_path.resolve():
+            print(f"{tag} Already at {md_path.name} ({len(md_content)} chars)")
+        elif _write_if_changed(md_path, md_content):
+            print(f"{tag} Copied to {md_path.name} ({len(md_content)} chars)")
+        else:
+            print(f"{tag} {md_path.name} unchanged ({len(md_content)} chars)")
+
+        return {
+            "id": slug,
+            "name": display_name,
+            "file": f"/data/{file_path.name}",
+            "type": "md",
+            "pageCount": 1,
+            "mdFile": f"/data/{slug}.md",
+        }
+
+    # PDFs and structured files: parse with Reducto
+    if json_path.exists():
+        print(f"{tag} .reducto.json already exists, loading...")
+        if ext in PDF_EXTS and not _compact_is_fresh(slug, json_path):
+            md_content, page_count, table = walk_reducto(read_json(json_path))
+            _write_compact(slug, table, tag)
+        else:
+            md_content, page_count = read_reducto_file(json_path)
+    else:
+        limiter.acquire()
+        print(f"{tag} Parsing {ext} with Reducto...")
+        try:
+            reducto_data = parse_and_get_raw_result(BASE_URL, api_key, str(file_path))
+            write_json(json_path, reducto_data)
+            print(f"{tag} Saved {json_path.name}")
+        except Exception as e:
+            print(f"{tag} ERROR: {e}")
+            return None
+        md_content, page_count, table = walk_reducto(reducto_data, with_blocks=ext in PDF_EXTS)
+        if ext in PDF_EXTS:
+            _write_compact(slug, table, tag)
+
+    if _write_if_changed(md_path, md_content):
+        print(f"{tag} Saved {md_path.name} ({len(md_content)} chars)")
+    else:
+        print(f"{tag} {md_path.name} unchanged ({len(md_content)} chars)")
+
+    if ext in PDF_EXTS:
+        source_type = "pdf"
+    else:
+        # Non-PDF structured files are rendered as markdown
+        source_type = "md"
+        page_count = 1
+
+    return {
+        "id": slug,
+        "name": display_name,
+        "file": f"/data/{file_path.name}",
+        "type": source_type,
+        "pageCount": page_count,
+        "mdFile": f"/data/{slug}.md",
+        "jsonFile": f"/data/{slug}.reducto.json",
+    }
 
 
 def main():
     api_key = get_api_key()
     # API key only required for Reducto-parsed files; we'll check lazily
 
-    # Find all supported files
+    # Find all supported files (any extension case) in a single directory scan
     all_files = []
-    for ext in ALL_EXTS:
-        all_files.extend(DATA_DIR.glob(f"*{ext}"))
-    # Also catch uppercase extensions
-    for ext in ALL_EXTS:
-        all_files.extend(DATA_DIR.glob(f"*{ext.upper()}"))
-    # Deduplicate and sort
-    all_files = sorted(set(all_files))
-    all_files = [f for f in all_files if f.name.lower() not in SKIP_FILES]
+    generated_md_slugs = set()
+    with os.scandir(DATA_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            if entry.name.endswith(".reducto.json"):
+                generated_md_slugs.add(entry.name[: -len(".reducto.json")])
+            elif Path(entry.name).suffix.lower() in ALL_EXTS and entry.name.lower() not in SKIP_FILES:
+                all_files.append(Path(entry.path))
+    all_files.sort()
     # Exclude generated .md files (those with a corresponding .reducto.json or original file)
-    generated_md_slugs = {f.name.replace(".reducto.json", "") for f in DATA_DIR.glob("*.reducto.json")}
     all_files = [
         f for f in all_files
         if not (f.suffix.lower() == ".md" and f.stem in generated_md_slugs)
@@ -99,136 +285,49 @@ def main():
 
     print(f"Found {len(all_files)} files to process (skipping {', '.join(SKIP_FILES)})\n")
 
-    sources_index = []
-
-    for i, file_path in enumerate(all_files, 1):
-        ext = file_path.suffix.lower()
-        slug = slugify(file_path.name)
-        json_path = DATA_DIR / f"{slug}.reducto.json"
-        md_path = DATA_DIR / f"{slug}.md"
-        display_name = file_path.stem
-
-        print(f"[{i}/{len(all_files)}] {file_path.name}")
-        print(f"  Slug: {slug}")
+    if not api_key and any(f.suffix.lower() not in DIRECT_MD_EXTS for f in all_files):
+        print("Error: REDUCTO_API_KEY not found for file parsing.")
+        print("Set REDUCTO_API_KEY env var or create ~/.reducto/config.yaml with api_key field.")
+        sys.exit(1)
 
-        called_api = False
+    # Cached and markdown files are handled inline; only files that need a
+    # Reducto call go to the worker pool.
+    entries: dict[int, dict] = {}
+    pending: list[tuple[int, Path]] = []
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
 
-        if ext in PDF_EXTS:
-            # PDF: parse with Reducto (existing flow)
-            source_type = "pdf"
-            if not api_key:
-                print("Error: REDUCTO_API_KEY not found for PDF parsing.")
-                print("Set REDUCTO_API_KEY env var or create ~/.reducto/config.yaml with api_key field.")
-                sys.exit(1)
-
-            if json_path.exists():
-                print(f"  .reducto.json already exists, loading...")
-                with open(json_path) as f:
-                    reducto_data = json.load(f)
-            else:
-                print(f"  Parsing with Reducto...")
-                try:
-                    reducto_data = parse_and_get_raw_result(BASE_URL, api_key, str(file_path))
-                    with open(json_path, "w") as f:
-                        json.dump(reducto_data, f, indent=2)
-                    print(f"  Saved {json_path.name}")
-                    called_api = True
-                except Exception as e:
-                    print(f"  ERROR: {e}")
-                    continue
-
-            md_content = extract_markdown(reducto_data)
-            with open(md_path, "w") as f:
-                f.write(md_content)
-            print(f"  Saved {md_path.name} ({len(md_content)} chars)")
-
-            page_count = get_page_count(reducto_data)
-
-            sources_index.append({
-                "id": slug,
-                "name": display_name,
-                "file": f"/data/{file_path.name}",
-                "type": "pdf",
-                "pageCount": page_count,
-                "mdFile": f"/data/{slug}.md",
-                "jsonFile": f"/data/{slug}.reducto.json",
-            })
-
-        elif ext in REDUCTO_EXTS:
-            # Non-PDF structured files: send to Reducto for markdown conversion
-            source_type = "md"
-            if not api_key:
-                print("Error: REDUCTO_API_KEY not found for file parsing.")
-                print("Set REDUCTO_API_KEY env var or create ~/.reducto/config.yaml with api_key field.")
-                sys.exit(1)
-
-            if json_path.exists():
-                print(f"  .reducto.json already exists, loading...")
-                with open(json_path) as f:
-                    reducto_data = json.load(f)
-            else:
-                print(f"  Parsing {ext} with Reducto...")
-                try:
-                    reducto_data = parse_and_get_raw_result(BASE_URL, api_key, str(file_path))
-                    with open(json_path, "w") as f:
-                        json.dump(reducto_data, f, indent=2)
-                    print(f"  Saved {json_path.name}")
-                    called_api = True
-                except Exception as e:
-                    print(f"  ERROR: {e}")
-                    continue
-
-            md_content = extract_markdown(reducto_data)
-            with open(md_path, "w") as f:
-                f.write(md_content)
-            print(f"  Saved {md_path.name} ({len(md_content)} chars)")
-
-            sources_index.append({
-                "id": slug,
-                "name": display_name,
-                "file": f"/data/{file_path.name}",
-                "type": "md",
-                "pageCount": 1,
-                "mdFile": f"/data/{slug}.md",
-                "jsonFile": f"/data/{slug}.reducto.json",
-            })
-
-        elif ext in DIRECT_MD_EXTS:
-            # Markdown files: use directly, no Reducto needed
-            source_type = "md"
-            print(f"  Using markdown file directly (no Reducto)")
-
-            # Copy/symlink to slug-based name if different
-            with open(file_path) as f:
-                md_content = f.read()
-            if md_path != file_path:
-                with open(md_path, "w") as f:
-                    f.write(md_content)
-                print(f"  Copied to {md_path.name} ({len(md_content)} chars)")
-            else:
-                print(f"  Already at {md_path.name} ({len(md_content)} chars)")
-
-            sources_index.append({
-                "id": slug,
-                "name": display_name,
-                "file": f"/data/{file_path.name}",
-                "type": "md",
-                "pageCount": 1,
-                "mdFile": f"/data/{slug}.md",
-            })
-
-        # Rate limit delay between API calls
-        if called_api and i < len(all_files):
-            print(f"  Waiting 2s (rate limit)...")
-            time.sleep(2)
-
-        print()
+    for i, file_path in enumerate(all_files):
+        slug = slugify(file_path.name)
+        needs_api = (
+            file_path.suffix.lower() not in DIRECT_MD_EXTS
+            and not (DATA_DIR / f"{slug}.reducto.json").exists()
+        )
+        if needs_api:
+            pending.append((i, file_path))
+            continue
+        entry = _process_one(file_path, api_key, limiter)
+        if entry:
+            entries[i] = entry
+
+    if pending:
+        print(f"\nParsing {len(pending)} files with Reducto ({MAX_WORKERS} workers)...\n")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(_process_one, file_path, api_key, limiter): i
+                for i, file_path in pending
+            }
+            for future in as_completed(futures):
+                entry = future.result()
+                if entry:
+                    entries[futures[future]] = entry
+
+    # Keep the index in file order regardless of completion order
+    sources_index = [entries[i] for i in sorted(entries)]
 
     # Write sources index
     index_path = DATA_DIR / "sources_index.json"
-    with open(index_path, "w") as f:
-        json.dump(sources_index, f, indent=2)
-    print(f"Wrote {index_path} with {len(sources_index)} sources")
+    write_json(index_path, sources_index, canonical=True)
+    print(f"\nWrote {index_path} with {len(sources_index)} sources")
 
 
 if __name__ == "__main__":
@@ -34,7 +34,8 @@ SCHEMA_PATH = SCRIPT_DIR / "schema.json"
 
 # Import citation finders for direct use (avoids subprocess overhead)
 sys.path.insert(0, str(SCRIPT_DIR))
-from find_citation import find_citation, find_md_citation
+from find_citation import find_citations, find_md_citation
+from json_io import read_json, write_json
 
 
 def get_field_type(prop: dict) -> str:
@@ -245,10 +246,11 @@ def parse_extraction_response(response_text: str) -> list[dict]:
 
 
 def resolve_citations(extractions: list[dict], sources_index: list[dict] | None = None) -> list[dict]:
-    """Resolve text snippets to citations using find_citation or find_md_citation.
+    """Resolve text snippets to citations using find_citations or find_md_citation.
 
     If sources_index is provided, routes to the appropriate citation finder
-    based on source type. Otherwise falls back to find_citation (PDF) for all.
+    based on source type. Otherwise falls back to find_citations (PDF) for all.
+    PDF snippets are resolved in one batch per source.
     """
     # Build source type lookup
     source_types: dict[str, str] = {}
@@ -256,6 +258,19 @@ def resolve_citations(extractions: list[dict], sources_index: list[dict] | None
         for src in sources_index:
             source_types[src["id"]] = src.get("type", "pdf")
 
+    # Group PDF snippets by source so each source is resolved in one batch
+    pdf_snippets: dict[str, list[str]] = {}
+    for ext in extractions:
+        for cit in ext.get("citations", []):
+            source_id = cit.get("source_id", "")
+            snippet = cit.get("text_snippet", "")
+            if source_id and snippet and source_types.get(source_id, "pdf") != "md":
+                pdf_snippets.setdefault(source_id, []).append(snippet)
+    pdf_results: dict[tuple[str, str], dict | None] = {}
+    for source_id, snippets in pdf_snippets.items():
+        for snippet, result in zip(snippets, find_citations(source_id, snippets)):
+            pdf_results[(source_id, snippet)] = result
+
     resolved = []
     total = sum(len(e.get("citations", [])) for e in extractions)
     done = 0
@@ -274,7 +289,7 @@ def resolve_citations(extractions: list[dict], sources_index: list[dict] | None
             if src_type == "md":
                 result = find_md_citation(source_id, snippet)
             else:
-                result = find_citation(source_id, snippet)
+                result = pdf_results[(source_id, snippet)]
 
             if result and "error" not in result:
                 field_citations.append(result)
@@ -421,13 +436,11 @@ def main():
         print(f"Error: {index_path} not found. Run batch_parse.py first.")
         sys.exit(1)
 
-    with open(index_path) as f:
-        sources = json.load(f)
+    sources = read_json(index_path)
     print(f"Loaded {len(sources)} sources from index")
 
     # Load schema
-    with open(SCHEMA_PATH) as f:
-        schema = json.load(f)
+    schema = read_json(SCHEMA_PATH)
     schema_fields = flatten_schema(schema)
     print(f"Schema has {len(schema_fields)} fields to extract")
 
@@ -469,8 +482,7 @@ def main():
     # Assemble and write data.json
     data = assemble_data_json(sources, resolved, schema)
     output_path = DATA_DIR / "data.json"
-    with open(output_path, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json(output_path, data, canonical=True)
     print(f"Wrote {output_path} with {len(data['sources'])} sources and {len(data['fields'])} fields")
 
 
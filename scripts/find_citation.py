@@ -5,7 +5,14 @@ For PDF sources, returns a PdfCitation with bounding box coordinates.
 For markdown sources, returns an MdCitation with table region or text snippet.
 
 Usage:
-    python3 scripts/find_citation.py <source_id> <text_snippet>
+    python3 scripts/find_citation.py <source_id> <text_snippet> [--type pdf|md] [--no-cache]
+    python3 scripts/find_citation.py --batch [--no-cache] < requests.jsonl
+
+--batch reads one {"source_id", "snippet", "type"} JSON object per line and
+prints one result per line, paying Python startup and block loading once.
+
+Results are cached on disk in public/data/.citation_cache.sqlite, keyed by
+source, snippet and scorer (SCORER_KEY); --no-cache bypasses the cache.
 
 Output (JSON):
     PDF:  {"type": "pdf", "sourceId": "...", "page": 1, "bbox": {"left": 0.07, ...}}
@@ -18,70 +25,404 @@ If no match found:
 
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
+import os
 import re
+import sqlite3
 import sys
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from difflib import SequenceMatcher
+from functools import lru_cache, partial
+from itertools import chain, repeat
 from pathlib import Path
+from typing import Callable
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+from json_io import HAVE_ORJSON, parse_json, read_json, write_bytes_atomic, write_json
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "public" / "data"
 
 # Block types to skip — these are navigational, not content
 SKIP_TYPES = {"Page Number", "Footer"}
 
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
 
-def load_blocks(source_id: str) -> list[dict]:
-    """Load all content blocks from a Reducto JSON file."""
-    json_path = DATA_DIR / f"{source_id}.reducto.json"
-    if not json_path.exists():
-        return []
 
-    with open(json_path) as f:
-        data = json.load(f)
+@dataclass
+class BlockTable:
+    """Scorable blocks of one source, stored column-wise.
+
+    Index i of every list describes the same block, so the scoring loops
+    index plain lists instead of looking fields up in per-block dicts.
+    """
+
+    contents: list[str] = field(default_factory=list)  # original block content
+    bc_norm: list[str] = field(default_factory=list)  # HTML-stripped lowercase
+    bc_raw: list[str] = field(default_factory=list)  # lowercase
+    bboxes: list[tuple[float, float, float, float]] = field(default_factory=list)  # left, top, width, height
+    pages: list[int] = field(default_factory=list)
 
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def add(self, block: dict) -> None:
+        """Append a raw Reducto block, skipping ones that cannot be cited."""
+        if block.get("type", "") in SKIP_TYPES:
+            return
+        content = block.get("content", "")
+        if not content or not content.strip():
+            return
+        bbox = block.get("bbox")
+        if not bbox:
+            return
+        bc, bc_raw = normalize_text(content)
+        if not bc:
+            # Markup only — can never match a snippet
+            return
+        self.contents.append(content)
+        self.bc_norm.append(bc)
+        self.bc_raw.append(bc_raw)
+        self.bboxes.append((
+            bbox.get("left", 0), bbox.get("top", 0), bbox.get("width", 0), bbox.get("height", 0),
+        ))
+        self.pages.append(bbox.get("page", 1))
+
+
+@dataclass
+class Corpus:
+    """A list of texts joined into one string, for substring search.
+
+    Finding which texts contain a needle takes a few str.find calls over the
+    joined string instead of one ``in`` test per text.
+    """
+
+    text: str
+    starts: list[int]  # offset of each text in ``text``
+    lengths: list[int]
+    by_length: list[int]  # text indices, shortest first
+    sorted_lengths: list[int]  # lengths in by_length order
+
+    @classmethod
+    def build(cls, texts: list[str]) -> Corpus:
+        starts = []
+        pos = 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + 1
+        lengths = [len(t) for t in texts]
+        by_length = sorted(range(len(texts)), key=lengths.__getitem__)
+        return cls(
+            text="\x00".join(texts),
+            starts=starts,
+            lengths=lengths,
+            by_length=by_length,
+            sorted_lengths=[lengths[i] for i in by_length],
+        )
+
+    def containing(self, needle: str) -> set[int]:
+        """Indices of the texts that contain needle."""
+        found = set()
+        n = len(needle)
+        pos = self.text.find(needle)
+        while pos != -1:
+            i = bisect_right(self.starts, pos) - 1
+            end = self.starts[i] + self.lengths[i]
+            if pos + n <= end:
+                # Inside text i; resume at the next text
+                found.add(i)
+                pos = end + 1
+            else:
+                # Spans a separator (or the separator occurs in the texts)
+                pos += 1
+            pos = self.text.find(needle, pos)
+        return found
+
+    def contained_in(self, haystack: str, texts: list[str]) -> set[int]:
+        """Indices of the texts (the list this corpus was built from) inside haystack."""
+        shorter = self.by_length[: bisect_right(self.sorted_lengths, len(haystack))]
+        return {i for i in shorter if texts[i] in haystack}
+
+
+# Loaded block tables per source_id, with the .reducto.json mtime they were
+# loaded from, so each Reducto JSON is read and normalized once per process
+# (and again only if it is re-parsed)
+_BLOCKS_CACHE: dict[str, tuple[int, BlockTable]] = {}
+
+# Character n-gram index per source_id (n-gram -> block indices), built lazily
+# the first time a source needs a fuzzy pass, with the BlockTable it indexes
+_NGRAM_INDEX_CACHE: dict[str, tuple[BlockTable, dict[str, list[int]]]] = {}
+NGRAM_SIZE = 4
+# Number of blocks sharing the most n-grams with a snippet that get fuzzy-scored
+FUZZY_CANDIDATES = 20
+
+# Joined block text per source_id, (HTML-stripped, raw), built lazily the
+# first time a source is searched for substrings, with the BlockTable it joins
+_CORPUS_CACHE: dict[str, tuple[BlockTable, tuple[Corpus, Corpus]]] = {}
+
+# Bump when the BlockTable layout changes so stale sidecars are ignored
+BLOCKS_SIDECAR_VERSION = 2
+
+# Bump when scoring logic changes so cached find_citation results are ignored
+SCORING_VERSION = 3
+# Cache key for the scorer in use. RapidFuzz and difflib ratios can rank
+# blocks differently, so results from each are cached separately.
+SCORER_KEY = f"{SCORING_VERSION}-{'rf' if fuzz is not None else 'difflib'}"
+RESULT_CACHE_NAME = ".citation_cache.sqlite"
+_result_cache_db: sqlite3.Connection | None = None
+_result_cache_enabled = True
+
+# Without RapidFuzz the fuzzy pass is pure-Python SequenceMatcher work, so
+# batches with at least this many uncached snippets are spread across CPUs
+PARALLEL_MIN_SNIPPETS = 32
+
+
+def iter_reducto_blocks(data: dict):
+    """Yield every block in a parsed Reducto response (or bare result)."""
     result = data.get("result", data)
-    chunks = result.get("chunks", [])
+    for chunk in result.get("chunks", []):
+        yield from chunk.get("blocks", [])
+
+
+def _iter_raw_blocks(json_path: Path):
+    """Yield every block in a Reducto JSON file.
+
+    Parses the whole file with orjson when available (fastest). Otherwise
+    streams with ijson, so only one block is materialized at a time. Handles
+    both the raw API response (``result.chunks``) and a bare result
+    (``chunks``) at the top level.
+    """
+    if HAVE_ORJSON or ijson is None:
+        yield from iter_reducto_blocks(read_json(json_path))
+        return
+
+    with open(json_path, "rb") as f:
+        found = False
+        for block in ijson.items(f, "result.chunks.item.blocks.item", use_float=True):
+            found = True
+            yield block
+        if found:
+            return
+        f.seek(0)
+        yield from ijson.items(f, "chunks.item.blocks.item", use_float=True)
+
+
+def clear_cache() -> None:
+    """Drop all cached blocks and in-process results (e.g. after regenerating sources)."""
+    _BLOCKS_CACHE.clear()
+    _NGRAM_INDEX_CACHE.clear()
+    _CORPUS_CACHE.clear()
+    _MD_INDEX_CACHE.clear()
+    _find_citation.cache_clear()
+    _find_md_citation.cache_clear()
+
+
+def build_block_table(raw_blocks) -> BlockTable:
+    """Filter Reducto blocks down to scorable content and normalize their text."""
+    table = BlockTable()
+    for block in raw_blocks:
+        table.add(block)
+    return table
 
-    blocks = []
-    for chunk in chunks:
-        for block in chunk.get("blocks", []):
-            block_type = block.get("type", "")
-            if block_type in SKIP_TYPES:
-                continue
-            content = block.get("content", "")
-            if not content or not content.strip():
-                continue
-            bbox = block.get("bbox")
-            if not bbox:
-                continue
-            blocks.append(block)
 
-    return blocks
+def blocks_sidecar_path(source_id: str) -> Path:
+    """Path of the compact msgpack block table written next to the JSON."""
+    return DATA_DIR / f"{source_id}.blocks.msgpack"
+
+
+def write_blocks_sidecar(source_id: str, table: BlockTable) -> bool:
+    """Save a block table so later runs can skip decoding the Reducto JSON.
+
+    Returns False (and writes nothing) if msgpack is not installed.
+    """
+    if msgpack is None:
+        return False
+    payload = {
+        "version": BLOCKS_SIDECAR_VERSION,
+        "contents": table.contents,
+        "bc_norm": table.bc_norm,
+        "bc_raw": table.bc_raw,
+        "bboxes": table.bboxes,
+        "pages": table.pages,
+    }
+    # Written atomically: other processes may be loading or writing it too
+    write_bytes_atomic(blocks_sidecar_path(source_id), msgpack.packb(payload))
+    return True
+
+
+def _read_blocks_sidecar(source_id: str, json_path: Path) -> BlockTable | None:
+    """Load the block table from the sidecar, or None if missing, stale or unreadable."""
+    sidecar = blocks_sidecar_path(source_id)
+    if msgpack is None or not sidecar.exists():
+        return None
+    if sidecar.stat().st_mtime < json_path.stat().st_mtime:
+        return None
+    try:
+        payload = msgpack.unpackb(sidecar.read_bytes())
+    except ValueError:
+        return None  # truncated or corrupt: rebuilt from the JSON
+    if not isinstance(payload, dict) or payload.get("version") != BLOCKS_SIDECAR_VERSION:
+        return None
+    return BlockTable(
+        contents=payload["contents"],
+        bc_norm=payload["bc_norm"],
+        bc_raw=payload["bc_raw"],
+        bboxes=[tuple(b) for b in payload["bboxes"]],
+        pages=payload["pages"],
+    )
+
+
+def load_blocks(source_id: str) -> BlockTable:
+    """Load all scorable blocks for a source as a BlockTable.
+
+    Prefers the ``.blocks.msgpack`` sidecar written by batch_parse.py when it
+    is newer than the ``.reducto.json``; otherwise parses the JSON and writes
+    the sidecar so the next process can skip that. Results are cached per
+    source_id while the JSON's mtime is unchanged, so scoring never has to
+    re-normalize block content.
+    """
+    json_path = DATA_DIR / f"{source_id}.reducto.json"
+    try:
+        mtime = json_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    cached = _BLOCKS_CACHE.get(source_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    # New or re-parsed source: drop everything derived from the old blocks
+    _BLOCKS_CACHE.pop(source_id, None)
+    _NGRAM_INDEX_CACHE.pop(source_id, None)
+    _CORPUS_CACHE.pop(source_id, None)
+    if mtime is None:
+        return BlockTable()
+
+    table = _read_blocks_sidecar(source_id, json_path)
+    if table is None:
+        table = build_block_table(_iter_raw_blocks(json_path))
+        try:
+            write_blocks_sidecar(source_id, table)
+        except OSError:
+            pass  # read-only data dir: keep working from the JSON
+
+    _BLOCKS_CACHE[source_id] = (mtime, table)
+    return table
+
+
+def _ngrams(text: str) -> set[str]:
+    """Distinct character n-grams of text."""
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def load_ngram_index(source_id: str, table: BlockTable | None = None) -> dict[str, list[int]]:
+    """Map each n-gram of a source's normalized block text to block indices.
+
+    ``table`` is the source's current load_blocks() result, if the caller
+    already has it; otherwise the source is loaded (and re-checked) here.
+    """
+    if table is None:
+        table = load_blocks(source_id)
+    cached = _NGRAM_INDEX_CACHE.get(source_id)
+    if cached and cached[0] is table:
+        return cached[1]
+
+    index: dict[str, list[int]] = defaultdict(list)
+    for i, bc in enumerate(table.bc_norm):
+        for gram in _ngrams(bc):
+            index[gram].append(i)
+
+    _NGRAM_INDEX_CACHE[source_id] = (table, index)
+    return index
+
+
+def load_corpora(source_id: str, table: BlockTable | None = None) -> tuple[Corpus, Corpus]:
+    """The (HTML-stripped, raw) block text of a source, each as one Corpus.
+
+    ``table`` is as for load_ngram_index().
+    """
+    if table is None:
+        table = load_blocks(source_id)
+    cached = _CORPUS_CACHE.get(source_id)
+    if cached and cached[0] is table:
+        return cached[1]
+    corpora = (Corpus.build(table.bc_norm), Corpus.build(table.bc_raw))
+    _CORPUS_CACHE[source_id] = (table, corpora)
+    return corpora
+
+
+def fuzzy_candidates(
+    source_id: str, sn: str, table: BlockTable | None = None
+) -> list[int] | range:
+    """Indices of blocks worth fuzzy-scoring against a snippet, in document order.
+
+    Keeps the FUZZY_CANDIDATES blocks that share the most n-grams with the
+    snippet. Falls back to every block for small sources or snippets too short
+    to have n-grams. ``table`` is as for load_ngram_index().
+    """
+    if table is None:
+        table = load_blocks(source_id)
+    n_blocks = len(table)
+    grams = _ngrams(sn)
+    if n_blocks <= FUZZY_CANDIDATES or not grams:
+        return range(n_blocks)
+
+    # Count shared n-grams per block in one pass over all matching postings.
+    # Ties go to the earlier block: Counter.most_common() would break them by
+    # insertion order, which follows the (hash-seeded) order of the gram set.
+    index = load_ngram_index(source_id, table)
+    hits = Counter(chain.from_iterable([index.get(gram, ()) for gram in grams]))
+    return sorted(heapq.nsmallest(FUZZY_CANDIDATES, hits, key=lambda i: (-hits[i], i)))
 
 
 def strip_html(text: str) -> str:
     """Strip HTML tags and collapse whitespace."""
-    text = re.sub(r"<[^>]+>", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # Most Reducto text blocks have no markup; skip the tag pass for them
+    if "<" in text:
+        text = _TAG_RE.sub(" ", text)
+    return _WS_RE.sub(" ", text).strip()
 
 
-def score_block(block_content: str, snippet: str) -> float:
-    """Score how well a block matches a text snippet.
+@lru_cache(maxsize=16384)
+def clean_cell(cell: str) -> str:
+    """HTML-stripped lowercase text of a markdown table cell.
 
-    Returns a score between 0 and 1. Substring matches always score >= 0.5
-    to ensure they beat any fuzzy match (which caps at 0.49).
+    Memoized: a markdown source re-cleans the same cells whenever its index
+    is rebuilt.
     """
-    # Strip HTML from both sides before comparison
-    bc_raw = block_content.strip().lower()
-    sn_raw = snippet.strip().lower()
-    bc = strip_html(bc_raw).lower()
-    sn = strip_html(sn_raw).lower()
+    return strip_html(cell.strip()).lower()
 
-    if not bc or not sn:
-        return 0.0
 
-    # Exact substring match — always scores >= 0.5
+def normalize_text(text: str) -> tuple[str, str]:
+    """Return the (HTML-stripped, raw) lowercase forms of text used for scoring."""
+    raw = text.strip().lower()
+    # strip_html only removes tags and whitespace, so its output stays lowercase
+    return strip_html(raw), raw
+
+
+def substring_score(bc: str, bc_raw: str, sn: str, sn_raw: str) -> float:
+    """Score a substring match between normalized block text and snippet.
+
+    Returns 0.5–1.0 if either text contains the other, else 0.0.
+    """
     # Check both with and without HTML stripping
     for block_text, snippet_text in [(bc, sn), (bc_raw, sn_raw)]:
         if snippet_text in block_text:
@@ -91,61 +432,526 @@ def score_block(block_content: str, snippet: str) -> float:
         if block_text in snippet_text:
             coverage = len(block_text) / max(len(snippet_text), 1)
             return 0.5 + coverage * 0.4  # Range: 0.5 to 0.9
+    return 0.0
 
-    # Fuzzy match — capped at 0.49 so it never beats a real substring match
-    matcher = SequenceMatcher(None, bc, sn)
-    ratio = matcher.ratio()
+
+def similarity_ratio(a: str, b: str, matcher: SequenceMatcher | None = None) -> float:
+    """Similarity of two strings from 0 to 1.
+
+    Uses RapidFuzz's native ratio when installed, else SequenceMatcher.ratio().
+    ``matcher`` may be a SequenceMatcher whose second sequence is already b,
+    so comparing many strings against one b only indexes b once.
+    """
+    if fuzz is not None:
+        return fuzz.ratio(a, b) / 100.0
+    if matcher is None:
+        matcher = SequenceMatcher(None, a, b)
+    else:
+        matcher.set_seq1(a)
+    return matcher.ratio()
+
+
+def snippet_matcher(sn: str) -> SequenceMatcher:
+    """A SequenceMatcher with sn indexed as its second sequence, for reuse."""
+    matcher = SequenceMatcher(None)
+    matcher.set_seq2(sn)
+    return matcher
+
+
+def fuzzy_score(
+    bc: str, sn: str, ratio: float | None = None, matcher: SequenceMatcher | None = None
+) -> float:
+    """Fuzzy-score HTML-stripped block text against a snippet, capped at 0.49.
+
+    ``ratio`` is the bc/sn similarity ratio, if the caller already has it.
+    ``matcher`` is a snippet_matcher(sn) to reuse across blocks.
+    """
+    # RapidFuzz computes the similarity ratio natively. SequenceMatcher is
+    # still used for the longest common substring: partial_ratio, WRatio and
+    # token_set_ratio are not substitutes. They saturate the 0.49 cap on most
+    # blocks and rank badly, and even uncapped they lose on reordered or
+    # reworded snippets.
+    if matcher is None:
+        matcher = SequenceMatcher(None, bc, sn)
+    else:
+        matcher.set_seq1(bc)
+    if ratio is None:
+        ratio = similarity_ratio(bc, sn, matcher)
     match = matcher.find_longest_match(0, len(bc), 0, len(sn))
     lcs_ratio = match.size / max(len(sn), 1)
+    return _combine_fuzzy(ratio, lcs_ratio)
 
+
+def _combine_fuzzy(ratio: float, lcs_ratio: float) -> float:
+    """Fuzzy score from the similarity ratio and longest-common-substring ratio."""
     raw_score = max(ratio * 0.6 + lcs_ratio * 0.4, lcs_ratio * 0.8)
     return min(raw_score, 0.49)
 
 
-def find_citation(source_id: str, snippet: str) -> dict | None:
-    """Find the best matching block for a text snippet (PDF sources).
+def fuzzy_upper_bound(bc: str, sn: str, ratio: float) -> float:
+    """Highest score fuzzy_score() can give bc, without computing the LCS.
 
-    Returns a PdfCitation dict with type="pdf".
+    ``ratio`` is either RapidFuzz's ratio (normalized Indel similarity) or,
+    without RapidFuzz, SequenceMatcher.quick_ratio(). Either way it is at
+    least the ratio fuzzy_score() uses, and ratio * (len(bc) + len(sn)) / 2
+    counts at least as many characters as any common substring has.
     """
-    blocks = load_blocks(source_id)
-    if not blocks:
-        return None
+    lcs_max = min(ratio * (len(bc) + len(sn)) / 2 + 1e-6, len(bc), len(sn))
+    return _combine_fuzzy(ratio, lcs_max / max(len(sn), 1))
+
+
+def fuzzy_bound(bc: str, sn: str, matcher: SequenceMatcher, floor: float) -> float:
+    """Cheap upper bound on fuzzy_score(bc, sn), tightened only while it reaches floor.
+
+    With RapidFuzz the exact ratio is cheap enough to use directly. Otherwise
+    ``matcher`` (a snippet_matcher(sn)) gives real_quick_ratio(), from the
+    lengths alone, and then quick_ratio(), from character counts; both are
+    far cheaper than ratio().
+    """
+    if fuzz is not None:
+        return fuzzy_upper_bound(bc, sn, fuzz.ratio(bc, sn) / 100.0)
+    matcher.set_seq1(bc)
+    bound = fuzzy_upper_bound(bc, sn, matcher.real_quick_ratio())
+    if bound >= floor:
+        bound = fuzzy_upper_bound(bc, sn, matcher.quick_ratio())
+    return bound
+
+
+def fuzzy_ratios(
+    bc_norm: list[str], candidates, sn: str, min_ratio: float = 0.0
+) -> dict[int, float]:
+    """Similarity ratios of sn against the candidate texts, keyed by index.
+
+    Scores every candidate in one RapidFuzz call instead of one call per
+    text; ratios below ``min_ratio`` are left out. Returns an empty dict
+    without RapidFuzz; callers then compute each ratio with SequenceMatcher.
+    """
+    if process is None:
+        return {}
+    choices = {i: bc_norm[i] for i in candidates}
+    # processor=None: RapidFuzz 2.x preprocessed strings in process.* by
+    # default, which would make these ratios disagree with fuzz.ratio()
+    matches = process.extract(
+        sn, choices, scorer=fuzz.ratio, processor=None, limit=None,
+        score_cutoff=min_ratio * 100,
+    )
+    return {i: score / 100.0 for _, score, i in matches}
+
+
+def score_precomputed(
+    bc: str,
+    bc_raw: str,
+    sn: str,
+    sn_raw: str,
+    must_beat: float = 0.0,
+    matcher: SequenceMatcher | None = None,
+) -> float:
+    """Score already-normalized block text against an already-normalized snippet.
+
+    ``bc``/``sn`` are HTML-stripped lowercase text and ``bc_raw``/``sn_raw``
+    the plain lowercase text, as returned by normalize_text(). Returns a score
+    between 0 and 1. Substring matches always score >= 0.5 to ensure they beat
+    any fuzzy match (which caps at 0.49).
+
+    When searching for the best block, pass the score to beat as
+    ``must_beat``: fuzzy scores that provably cannot exceed it are skipped
+    and reported as 0.0. Passing a snippet_matcher(sn) as ``matcher`` saves
+    re-indexing sn for every block.
+    """
+    if not bc or not sn:
+        return 0.0
+
+    # Exact substring match — always scores >= 0.5
+    score = substring_score(bc, bc_raw, sn, sn_raw)
+    if score:
+        return score
+
+    # Fuzzy match — capped at 0.49 so it never beats a real substring match
+    if matcher is None:
+        matcher = snippet_matcher(sn)
+    if must_beat > 0 and fuzzy_bound(bc, sn, matcher, must_beat) <= must_beat:
+        return 0.0
+    return fuzzy_score(bc, sn, matcher=matcher)
+
+
+def score_block(block_content: str, snippet: str) -> float:
+    """Score how well a block matches a text snippet.
+
+    Convenience wrapper around score_precomputed() for one-off comparisons.
+    """
+    # Strip HTML from both sides before comparison
+    return score_precomputed(*normalize_text(block_content), *normalize_text(snippet))
+
+
+def best_match(
+    source_id: str, sn: str, sn_raw: str, table: BlockTable | None = None
+) -> tuple[float, int | None]:
+    """Find the best-scoring block for a snippet normalized with normalize_text().
+
+    Substring matches are found in a cheap first pass. Since they always
+    outrank fuzzy matches, the fuzzy pass only runs when none exist. Ties go
+    to the shorter block (more precise bbox).
+
+    ``table`` is as for load_ngram_index().
+
+    Returns (score, block index), or (0.0, None) if nothing scored above zero.
+    """
+    if table is None:
+        table = load_blocks(source_id)
+    bc_norm, bc_raw, contents = table.bc_norm, table.bc_raw, table.contents
 
     best_score = 0.0
-    best_block = None
+    best_idx = None
+    best_len = 0
+
+    # Pass 1: substring matches. Containment is found by searching each
+    # joined corpus, so only actual hits pay for substring_score and the
+    # tie-break; they are visited in block order, as a plain scan would.
+    corpus_norm, corpus_raw = load_corpora(source_id, table)
+    hits = sorted(
+        corpus_norm.containing(sn) | corpus_norm.contained_in(sn, bc_norm)
+        | corpus_raw.containing(sn_raw) | corpus_raw.contained_in(sn_raw, bc_raw)
+    )
+    for i in hits:
+        score = substring_score(bc_norm[i], bc_raw[i], sn, sn_raw)
+        if score > best_score or (score == best_score and len(contents[i]) < best_len):
+            best_score, best_idx, best_len = score, i, len(contents[i])
+
+    # Pass 2: fuzzy matches, only if nothing contained the snippet, and only
+    # against the blocks most likely to match
+    if best_idx is None:
+        candidates = list(fuzzy_candidates(source_id, sn, table))
+        ratios = fuzzy_ratios(bc_norm, candidates, sn)
+        matcher = snippet_matcher(sn)
+        # Visit blocks from the highest possible score down, so the LCS (the
+        # slow part) stops being computed once no remaining block can win.
+        # Ties still go to the shorter block, then the earlier candidate.
+        # Without RapidFuzz ratios, order by the length-only bound and tighten
+        # it per block below.
+        bounds = []
+        for i in candidates:
+            ratio = ratios.get(i)
+            if ratio is None:
+                matcher.set_seq1(bc_norm[i])
+                ratio = matcher.real_quick_ratio()
+            bounds.append(fuzzy_upper_bound(bc_norm[i], sn, ratio))
+        best_pos = None
+        for pos in sorted(range(len(candidates)), key=bounds.__getitem__, reverse=True):
+            if bounds[pos] < best_score:
+                break
+            i = candidates[pos]
+            if (
+                best_idx is not None and bounds[pos] == best_score
+                and (len(contents[i]), pos) > (best_len, best_pos)
+            ):
+                continue  # can at best tie, and would lose the tie-break
+            if i not in ratios and fuzzy_bound(bc_norm[i], sn, matcher, best_score) < best_score:
+                continue
+            score = fuzzy_score(bc_norm[i], sn, ratios.get(i), matcher)
+            if score > best_score or (
+                score == best_score and best_idx is not None
+                and (len(contents[i]), pos) < (best_len, best_pos)
+            ):
+                best_score, best_idx, best_len, best_pos = score, i, len(contents[i]), pos
 
-    for block in blocks:
-        content = block.get("content", "")
-        score = score_block(content, snippet)
+    return best_score, best_idx
 
-        if score > best_score:
-            best_score = score
-            best_block = block
-        elif score == best_score and best_block:
-            # Prefer shorter blocks (more precise bbox)
-            if len(content) < len(best_block.get("content", "")):
-                best_block = block
 
-    if best_block is None or best_score < 0.1:
+@lru_cache(maxsize=4096)
+def _find_citation(source_id: str, snippet: str, json_mtime: int = 0) -> dict | None:
+    """Body of find_citation() without the on-disk cache (memoized in-process).
+
+    ``json_mtime`` is only part of the memo key.
+    """
+    table = load_blocks(source_id)
+    if not table:
+        return None
+
+    # Normalize the snippet once for every block comparison
+    sn, sn_raw = normalize_text(snippet)
+    if not sn:
+        return None
+
+    best_score, best_idx = best_match(source_id, sn, sn_raw, table)
+    if best_idx is None or best_score < 0.1:
         return None
 
-    bbox = best_block["bbox"]
+    left, top, width, height = table.bboxes[best_idx]
     return {
         "type": "pdf",
         "sourceId": source_id,
-        "page": bbox.get("page", 1),
+        "page": table.pages[best_idx],
         "bbox": {
-            "left": round(bbox.get("left", 0), 6),
-            "top": round(bbox.get("top", 0), 6),
-            "width": round(bbox.get("width", 0), 6),
-            "height": round(bbox.get("height", 0), 6),
+            "left": round(left, 6),
+            "top": round(top, 6),
+            "width": round(width, 6),
+            "height": round(height, 6),
         },
     }
 
 
+def set_result_cache(enabled: bool) -> None:
+    """Turn the on-disk find_citation result cache on or off for this process."""
+    global _result_cache_enabled
+    _result_cache_enabled = enabled
+
+
+def _result_cache() -> sqlite3.Connection | None:
+    """Open (once) the on-disk result cache, or None if disabled/unavailable."""
+    global _result_cache_db
+    if not _result_cache_enabled:
+        return None
+    if _result_cache_db is None:
+        try:
+            db = sqlite3.connect(DATA_DIR / RESULT_CACHE_NAME)
+            # Losing a cache write on crash is harmless; skip fsyncs
+            db.execute("PRAGMA synchronous = OFF")
+            # One table per finder: a PDF and a markdown source can share a slug
+            for table in ("cache", "md_cache"):
+                db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " source_id TEXT, snippet_hash BLOB, scoring_version TEXT,"
+                    " source_mtime INTEGER, result_json TEXT,"
+                    " PRIMARY KEY (source_id, snippet_hash, scoring_version))"
+                )
+        except sqlite3.Error:
+            set_result_cache(False)
+            return None
+        _result_cache_db = db
+    return _result_cache_db
+
+
+def _cached_results(
+    table: str,
+    mtime: int | None,
+    source_id: str,
+    snippets: list[str],
+    find: Callable[[str, str], dict | None],
+) -> list[dict | None]:
+    """Look snippets up in a result cache table, running find() on misses.
+
+    ``mtime`` is the source file's mtime, read before any scoring (None if
+    the file is missing; nothing is cached then). The loaders reload a source
+    whose mtime changed, so a row is never stamped newer than what it was
+    scored against. Rows are keyed by (source_id, snippet hash, SCORER_KEY)
+    and only reused while the source keeps that mtime.
+    Repeated snippets are only looked up once and new rows are committed in a
+    single transaction. The cache is best-effort: if the database is locked
+    or read-only, results are still returned and the cache is turned off for
+    the rest of the process.
+    """
+    unique = list(dict.fromkeys(snippets))
+    db = _result_cache() if mtime is not None else None
+    if db is None:
+        found = dict(zip(unique, _find_all(find, source_id, unique)))
+        return [found[snippet] for snippet in snippets]
+
+    hashes = {
+        snippet: hashlib.blake2b(snippet.encode(), digest_size=16).digest() for snippet in unique
+    }
+    found = {}
+    try:
+        for snippet, snippet_hash in hashes.items():
+            row = db.execute(
+                f"SELECT source_mtime, result_json FROM {table}"
+                " WHERE source_id = ? AND snippet_hash = ? AND scoring_version = ?",
+                (source_id, snippet_hash, SCORER_KEY),
+            ).fetchone()
+            if row and row[0] == mtime:
+                found[snippet] = parse_json(row[1])
+    except sqlite3.Error:
+        # Locked or unreadable: score the rest without the cache
+        set_result_cache(False)
+        db = None
+
+    misses = [snippet for snippet in unique if snippet not in found]
+    new_rows = []
+    for snippet, result in zip(misses, _find_all(find, source_id, misses)):
+        found[snippet] = result
+        new_rows.append((source_id, hashes[snippet], SCORER_KEY, mtime, json.dumps(result)))
+
+    if new_rows and db is not None:
+        try:
+            with db:
+                db.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?)", new_rows)
+        except sqlite3.Error:
+            set_result_cache(False)  # locked or read-only: keep the computed results
+    return [found[snippet] for snippet in snippets]
+
+
+def _init_worker(data_dir: Path) -> None:
+    """Point a _find_all() worker process at the parent's data directory."""
+    global DATA_DIR
+    DATA_DIR = data_dir
+
+
+def _find_all(
+    find: Callable[[str, str], dict | None], source_id: str, snippets: list[str]
+) -> list[dict | None]:
+    """Run find(source_id, snippet) for every snippet, in order.
+
+    Without RapidFuzz, batches of PARALLEL_MIN_SNIPPETS or more are shared
+    out to a process pool with one worker per CPU. Each worker loads the
+    source once for its share. With RapidFuzz the fuzzy pass is native code
+    already, and the pool would cost more to start than it saves.
+    """
+    workers = min(os.cpu_count() or 1, len(snippets))
+    if process is not None or len(snippets) < PARALLEL_MIN_SNIPPETS or workers < 2:
+        return [find(source_id, snippet) for snippet in snippets]
+    chunksize = -(-len(snippets) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(DATA_DIR,)) as pool:
+        return list(pool.map(find, repeat(source_id), snippets, chunksize=chunksize))
+
+
+def find_citations(source_id: str, snippets: list[str]) -> list[dict | None]:
+    """Find citations for several snippets in one PDF source.
+
+    Same results as calling find_citation() on each snippet, but cache hits
+    share one stat of the source (each snippet that is scored re-checks it
+    once more, in load_blocks()), repeated snippets are only scored once,
+    and new results are committed in a single transaction. Without
+    RapidFuzz, large batches are scored on every CPU (see _find_all()).
+
+    Returns one PdfCitation dict (or None) per snippet, in order.
+    """
+    json_path = DATA_DIR / f"{source_id}.reducto.json"
+    # Blocks are reloaded when the JSON is re-parsed, so key the in-process
+    # memo on its mtime too
+    try:
+        mtime = json_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    return _cached_results(
+        "cache", mtime, source_id, snippets, partial(_find_citation, json_mtime=mtime or 0),
+    )
+
+
+def find_citation(source_id: str, snippet: str) -> dict | None:
+    """Find the best matching block for a text snippet (PDF sources).
+
+    Results are cached on disk per (source_id, snippet, SCORER_KEY) and
+    reused while the source's .reducto.json is unchanged.
+
+    Returns a PdfCitation dict with type="pdf".
+    """
+    return find_citations(source_id, [snippet])[0]
+
+
 # ── Markdown citation support ──────────────────────────────────────────
 
 
+# Bump when the .md.idx.json layout changes so stale sidecars are ignored
+MD_INDEX_VERSION = 1
+
+
+@dataclass
+class MdIndex:
+    """A markdown source parsed into what find_md_citation() searches."""
+
+    content: str
+    tables: list[dict]  # as returned by parse_md_tables()
+    norm_tables: list[list[list[str]]]  # clean_cell() of every table cell
+    paragraphs: list[str]  # non-table text, see _extract_non_table_text()
+    content_lower: str = ""
+    # Every table row's normalized cells joined with spaces, as one Corpus;
+    # row_keys[i] is the (table index, row index) of row text i
+    rows: Corpus = field(init=False, repr=False)
+    row_keys: list[tuple[int, int]] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.content_lower:
+            self.content_lower = self.content.lower()
+        self.row_keys = [
+            (table_idx, row_idx)
+            for table_idx, norm_rows in enumerate(self.norm_tables)
+            for row_idx in range(len(norm_rows))
+        ]
+        self.rows = Corpus.build([
+            " ".join(norm_row) for norm_rows in self.norm_tables for norm_row in norm_rows
+        ])
+
+
+# Parsed markdown per source_id, with the .md mtime it was parsed from
+_MD_INDEX_CACHE: dict[str, tuple[int, MdIndex]] = {}
+
+
+def md_index_path(source_id: str) -> Path:
+    """Path of the parsed-markdown sidecar written next to the .md."""
+    return DATA_DIR / f"{source_id}.md.idx.json"
+
+
+def build_md_index(md_content: str) -> MdIndex:
+    """Parse markdown tables and paragraphs and normalize every cell."""
+    tables = parse_md_tables(md_content)
+    return MdIndex(
+        content=md_content,
+        tables=tables,
+        norm_tables=[[[clean_cell(c) for c in row] for row in table["rows"]] for table in tables],
+        paragraphs=_extract_non_table_text(md_content, tables),
+    )
+
+
+def load_md_index(source_id: str) -> MdIndex | None:
+    """Load a markdown source as an MdIndex, or None if there is no .md.
+
+    Cached per source_id while the .md is unchanged. The parse is also saved
+    as a ``.md.idx.json`` sidecar, reused by later processes while the .md
+    keeps the mtime and size recorded in it.
+    """
+    md_path = DATA_DIR / f"{source_id}.md"
+    if not md_path.exists():
+        return None
+    md_stat = md_path.stat()
+    cached = _MD_INDEX_CACHE.get(source_id)
+    if cached and cached[0] == md_stat.st_mtime_ns:
+        return cached[1]
+
+    md_content = md_path.read_text()
+    source_key = [md_stat.st_mtime_ns, md_stat.st_size]
+    index = _read_md_index(source_id, md_content, source_key)
+    if index is None:
+        index = build_md_index(md_content)
+        try:
+            write_json(md_index_path(source_id), {
+                "version": MD_INDEX_VERSION,
+                "source": source_key,
+                "tables": index.tables,
+                "norm_tables": index.norm_tables,
+                "paragraphs": index.paragraphs,
+            }, atomic=True)
+        except OSError:
+            pass  # read-only data dir: parse again next process
+    _MD_INDEX_CACHE[source_id] = (md_stat.st_mtime_ns, index)
+    return index
+
+
+def _read_md_index(source_id: str, md_content: str, source_key: list[int]) -> MdIndex | None:
+    """Load the parsed-markdown sidecar, or None if missing, stale or unreadable."""
+    sidecar = md_index_path(source_id)
+    if not sidecar.exists():
+        return None
+    try:
+        payload = read_json(sidecar)
+    except ValueError:
+        return None  # truncated or corrupt: parsed again from the .md
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != MD_INDEX_VERSION
+        or payload.get("source") != source_key
+    ):
+        return None
+    return MdIndex(
+        content=md_content,
+        tables=payload["tables"],
+        norm_tables=payload["norm_tables"],
+        paragraphs=payload["paragraphs"],
+    )
+
+
+# A GFM table separator row (e.g., |---|---|), matched against a stripped line
+_TABLE_SEP_RE = re.compile(r"^\|?[\s:]*-+[\s:]*(\|[\s:]*-+[\s:]*)*\|?\s*$")
+
+
 def parse_md_tables(md_content: str) -> list[dict]:
     """Parse GFM tables from markdown content.
 
@@ -154,16 +960,19 @@ def parse_md_tables(md_content: str) -> list[dict]:
         - start_line: line index where the table starts
         - end_line: line index where the table ends
     """
+    # Every table has a | in its header row
+    if "|" not in md_content:
+        return []
+
     lines = md_content.split("\n")
     tables = []
     i = 0
     while i < len(lines):
-        line = lines[i].strip()
         # A GFM table starts with a line containing | characters
-        if "|" in line and i + 1 < len(lines):
-            next_line = lines[i + 1].strip()
+        if "|" in lines[i] and i + 1 < len(lines):
+            next_line = lines[i + 1]
             # The second line must be a separator row (e.g., |---|---|)
-            if re.match(r"^\|?[\s:]*-+[\s:]*(\|[\s:]*-+[\s:]*)*\|?\s*$", next_line):
+            if "-" in next_line and _TABLE_SEP_RE.match(next_line.strip()):
                 # Found a table — parse all rows
                 table_start = i
                 rows = []
@@ -197,12 +1006,14 @@ def _parse_table_row(line: str) -> list[str]:
         line = line[1:]
     if line.endswith("|"):
         line = line[:-1]
-    return [cell.strip() for cell in line.split("|")]
+    return list(map(str.strip, line.split("|")))
 
 
 def find_md_citation(source_id: str, snippet: str) -> dict | None:
     """Find snippet location in a markdown source.
 
+    Results are cached on disk like find_citation()'s, keyed on the .md file.
+
     Returns an MdCitation dict — either with table region info
     (tableIndex, startRow, startCol) or just a snippet for text matches.
     """
@@ -210,8 +1021,24 @@ def find_md_citation(source_id: str, snippet: str) -> dict | None:
     if not md_path.exists():
         return None
 
-    with open(md_path) as f:
-        md_content = f.read()
+    # The .md is re-read on every miss, so key the in-process memo on its mtime too
+    md_mtime = md_path.stat().st_mtime_ns
+    return _cached_results(
+        "md_cache", md_mtime, source_id, [snippet],
+        partial(_find_md_citation, md_mtime=md_mtime),
+    )[0]
+
+
+@lru_cache(maxsize=4096)
+def _find_md_citation(source_id: str, snippet: str, md_mtime: int = 0) -> dict | None:
+    """Body of find_md_citation() without the on-disk cache (memoized in-process).
+
+    ``md_mtime`` is only part of the memo key.
+    """
+    index = load_md_index(source_id)
+    if index is None:
+        return None
+    md_content = index.content
 
     if not md_content or not snippet:
         return None
@@ -220,62 +1047,86 @@ def find_md_citation(source_id: str, snippet: str) -> dict | None:
     if not sn:
         return None
 
-    # Step 1: Search tables for the snippet
-    tables = parse_md_tables(md_content)
+    # Step 1: Search tables for the snippet. The index holds every cell
+    # already normalized; the table passes below only read those.
+    tables = index.tables
+    norm_tables = index.norm_tables
+    matcher = snippet_matcher(sn)
+    # Score all cells in one RapidFuzz call. Only a ratio of at least 0.4 can
+    # make a fuzzy cell match, so lower ones are dropped there.
+    flat_cells = [cell for norm_rows in norm_tables for norm_row in norm_rows for cell in norm_row]
+    cell_ratios = fuzzy_ratios(flat_cells, range(len(flat_cells)), sn, min_ratio=0.4)
     best_table_match = None
     best_table_score = 0.0
 
-    for table_idx, table in enumerate(tables):
-        for row_idx, row in enumerate(table["rows"]):
-            for col_idx, cell in enumerate(row):
-                cell_clean = strip_html(cell.strip()).lower()
-                if not cell_clean:
-                    continue
-
-                # Exact match in cell
-                if sn in cell_clean or cell_clean in sn:
-                    coverage = min(len(sn), len(cell_clean)) / max(len(sn), len(cell_clean), 1)
-                    score = 0.5 + coverage * 0.5
-                    if score > best_table_score:
-                        best_table_score = score
-                        best_table_match = {
-                            "type": "md",
-                            "sourceId": source_id,
-                            "tableIndex": table_idx,
-                            "startRow": row_idx,
-                            "startCol": col_idx,
-                            "snippet": snippet,
-                        }
-
-                # Fuzzy match
-                matcher = SequenceMatcher(None, cell_clean, sn)
+    cells = (
+        (table_idx, row_idx, col_idx, cell_clean)
+        for table_idx, norm_rows in enumerate(norm_tables)
+        for row_idx, norm_row in enumerate(norm_rows)
+        for col_idx, cell_clean in enumerate(norm_row)
+    )
+    for cell_idx, (table_idx, row_idx, col_idx, cell_clean) in enumerate(cells):
+        if not cell_clean:
+            continue
+
+        # Exact match in cell
+        if sn in cell_clean or cell_clean in sn:
+            coverage = min(len(sn), len(cell_clean)) / max(len(sn), len(cell_clean), 1)
+            score = 0.5 + coverage * 0.5
+            if score > best_table_score:
+                best_table_score = score
+                best_table_match = {
+                    "type": "md",
+                    "sourceId": source_id,
+                    "tableIndex": table_idx,
+                    "startRow": row_idx,
+                    "startCol": col_idx,
+                    "snippet": snippet,
+                }
+                if score >= 1.0:
+                    # The cell is the snippet — no cell or row can outscore it
+                    break
+
+        # Fuzzy match
+        if process is not None:
+            ratio = cell_ratios.get(cell_idx, 0.0)
+        else:
+            # Upper bounds first: a cell must beat the best score and reach 0.4
+            matcher.set_seq1(cell_clean)
+            floor = max(best_table_score, 0.4)
+            if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                ratio = 0.0
+            else:
                 ratio = matcher.ratio()
-                if ratio > best_table_score and ratio >= 0.4:
-                    best_table_score = ratio * 0.49  # Cap below substring match
-                    best_table_match = {
-                        "type": "md",
-                        "sourceId": source_id,
-                        "tableIndex": table_idx,
-                        "startRow": row_idx,
-                        "startCol": col_idx,
-                        "snippet": snippet,
-                    }
-
-    # Also check if snippet spans multiple cells in a row
-    for table_idx, table in enumerate(tables):
-        for row_idx, row in enumerate(table["rows"]):
-            row_text = " ".join(strip_html(c.strip()).lower() for c in row)
-            if sn in row_text:
-                score = 0.6 + (len(sn) / max(len(row_text), 1)) * 0.3
-                if score > best_table_score:
-                    best_table_score = score
-                    best_table_match = {
-                        "type": "md",
-                        "sourceId": source_id,
-                        "tableIndex": table_idx,
-                        "startRow": row_idx,
-                        "snippet": snippet,
-                    }
+        if ratio > best_table_score and ratio >= 0.4:
+            best_table_score = ratio * 0.49  # Cap below substring match
+            best_table_match = {
+                "type": "md",
+                "sourceId": source_id,
+                "tableIndex": table_idx,
+                "startRow": row_idx,
+                "startCol": col_idx,
+                "snippet": snippet,
+            }
+
+    # Also check if snippet spans multiple cells in a row. Row matches score
+    # below 0.9, so skip this when a cell already scored that high. Rows
+    # containing the snippet are found by searching the joined row corpus,
+    # then visited in document order, as a scan over every row would.
+    if best_table_score < 0.9:
+        rows = index.rows
+        for i in sorted(rows.containing(sn)):
+            score = 0.6 + (len(sn) / max(rows.lengths[i], 1)) * 0.3
+            if score > best_table_score:
+                table_idx, row_idx = index.row_keys[i]
+                best_table_score = score
+                best_table_match = {
+                    "type": "md",
+                    "sourceId": source_id,
+                    "tableIndex": table_idx,
+                    "startRow": row_idx,
+                    "snippet": snippet,
+                }
 
     if best_table_match and best_table_score >= 0.4:
         return best_table_match
@@ -285,7 +1136,7 @@ def find_md_citation(source_id: str, snippet: str) -> dict | None:
         return {"type": "md", "sourceId": source_id, "snippet": snippet}
 
     # Step 3: Case-insensitive / stripped search
-    md_lower = md_content.lower()
+    md_lower = index.content_lower
     sn_lower = snippet.strip().lower()
     if sn_lower in md_lower:
         # Find the actual text in the original to use as snippet
@@ -293,16 +1144,18 @@ def find_md_citation(source_id: str, snippet: str) -> dict | None:
         actual_snippet = md_content[idx : idx + len(sn_lower)]
         return {"type": "md", "sourceId": source_id, "snippet": actual_snippet}
 
-    # Step 4: Fuzzy fallback — reuse existing score_block logic against table cells
+    # Step 4: Fuzzy fallback — reuse the block scoring logic against table rows
     # and non-table content
     best_score = 0.0
     best_result = None
+    sn_norm = normalize_text(snippet)
+    matcher = snippet_matcher(sn_norm[0])
 
     # Try matching against full table rows
     for table_idx, table in enumerate(tables):
         for row_idx, row in enumerate(table["rows"]):
             row_text = " | ".join(row)
-            score = score_block(row_text, snippet)
+            score = score_precomputed(*normalize_text(row_text), *sn_norm, best_score, matcher)
             if score > best_score:
                 best_score = score
                 best_result = {
@@ -314,8 +1167,8 @@ def find_md_citation(source_id: str, snippet: str) -> dict | None:
                 }
 
     # Try matching against non-table paragraphs
-    for paragraph in _extract_non_table_text(md_content, tables):
-        score = score_block(paragraph, snippet)
+    for paragraph in index.paragraphs:
+        score = score_precomputed(*normalize_text(paragraph), *sn_norm, best_score, matcher)
         if score > best_score:
             best_score = score
             best_result = {
@@ -333,30 +1186,70 @@ def find_md_citation(source_id: str, snippet: str) -> dict | None:
 def _extract_non_table_text(md_content: str, tables: list[dict]) -> list[str]:
     """Extract paragraphs from markdown that are NOT inside tables."""
     lines = md_content.split("\n")
-    table_lines = set()
+    n_lines = len(lines)
+    # One byte per line, set for table lines: a slice assignment per table
+    in_table = bytearray(n_lines)
     for table in tables:
-        for ln in range(table["start_line"], table["end_line"] + 1):
-            table_lines.add(ln)
+        start, end = table["start_line"], min(table["end_line"] + 1, n_lines)
+        if start < end:
+            in_table[start:end] = b"\x01" * (end - start)
 
+    # Walk the runs of non-table lines, jumping over each table in one step.
+    # A table or a blank line ends the current paragraph.
     paragraphs = []
-    current = []
-    for i, line in enumerate(lines):
-        if i in table_lines:
-            if current:
+    pos = in_table.find(0)
+    while pos != -1:
+        stop = in_table.find(1, pos)
+        if stop == -1:
+            stop = n_lines
+        current = []
+        for line in lines[pos:stop]:
+            if line.strip():
+                current.append(line)
+            elif current:
                 paragraphs.append("\n".join(current))
                 current = []
-            continue
-        if line.strip():
-            current.append(line)
-        elif current:
+        if current:
             paragraphs.append("\n".join(current))
-            current = []
-    if current:
-        paragraphs.append("\n".join(current))
+        pos = in_table.find(0, stop)
     return paragraphs
 
 
+def _lookup(source_id: str, snippet: str, source_type: str) -> dict:
+    """Run the finder for source_type and wrap a miss in the CLI's error shape."""
+    if source_type == "md":
+        result = find_md_citation(source_id, snippet)
+    else:
+        result = find_citation(source_id, snippet)
+    return result or {"error": "no match found", "sourceId": source_id}
+
+
+def run_batch(lines) -> None:
+    """Answer one JSON request per input line with one JSON result per line.
+
+    Each line is {"source_id": ..., "snippet": ..., "type": "pdf"|"md"}
+    ("type" defaults to "pdf"). Output is flushed per line, so a caller can
+    keep one process open and reuse its loaded blocks across lookups.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            result = _lookup(request["source_id"], request["snippet"], request.get("type", "pdf"))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            result = {"error": f"bad request: {e}"}
+        print(json.dumps(result), flush=True)
+
+
 def main():
+    if "--no-cache" in sys.argv:
+        set_result_cache(False)
+
+    if "--batch" in sys.argv:
+        run_batch(sys.stdin)
+        return
+
     if len(sys.argv) < 3:
         print(json.dumps({"error": "Usage: find_citation.py <source_id> <text_snippet> [--type pdf|md]"}))
         sys.exit(1)
@@ -371,15 +1264,7 @@ def main():
         if idx + 1 < len(sys.argv):
             source_type = sys.argv[idx + 1]
 
-    if source_type == "md":
-        result = find_md_citation(source_id, snippet)
-    else:
-        result = find_citation(source_id, snippet)
-
-    if result:
-        print(json.dumps(result))
-    else:
-        print(json.dumps({"error": "no match found", "sourceId": source_id}))
+    print(json.dumps(_lookup(source_id, snippet, source_type)))
 
 
 if __name__ == "__main__":
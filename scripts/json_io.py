@@ -0,0 +1,77 @@
+"""JSON read/write helpers shared by the pipeline scripts.
+
+Uses orjson when installed (several times faster on large Reducto outputs)
+and falls back to the standard library otherwise. Output is indented with
+two spaces either way. The two libraries escape non-ASCII text differently,
+so files checked into git (data.json, sources_index.json) are written with
+write_json(..., canonical=True), which always uses the standard library.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HAVE_ORJSON = orjson is not None
+
+# The process umask, for giving atomically written files the usual permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def parse_json(raw: bytes | str) -> Any:
+    """Parse JSON text, e.g. an HTTP response body."""
+    if HAVE_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def read_json(path: str | Path) -> Any:
+    """Parse a JSON file, read in a single call."""
+    return parse_json(Path(path).read_bytes())
+
+
+def write_json(path: str | Path, data: Any, atomic: bool = False, canonical: bool = False) -> None:
+    """Write data to a JSON file with 2-space indentation, in a single call.
+
+    With ``atomic``, the file is replaced via write_bytes_atomic(). With
+    ``canonical``, the output is the standard library's (ASCII-escaped, with
+    a trailing newline), byte for byte the same whether or not orjson is
+    installed.
+    """
+    if canonical:
+        out = (json.dumps(data, indent=2) + "\n").encode()
+    elif HAVE_ORJSON:
+        out = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        out = json.dumps(data, indent=2).encode()
+    if atomic:
+        write_bytes_atomic(path, out)
+    else:
+        Path(path).write_bytes(out)
+
+
+def write_bytes_atomic(path: str | Path, data: bytes) -> None:
+    """Write data to path via a temp file and rename, so readers never see a partial file.
+
+    Concurrent writers each use their own temp file; the last rename wins.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp creates the file owner-only; match what open() would create
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 """Parse a PDF using Reducto API and save the full raw JSON response (with bounding boxes)."""
 
-import json
+from __future__ import annotations
+
 import os
 import sys
 import time
 import requests
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from json_io import parse_json, write_json
+
+# Job polling backoff: wait 1s, then 1.5x longer each time, capped at 15s
+POLL_INITIAL_DELAY = 1.0
+POLL_MAX_DELAY = 15.0
+POLL_BACKOFF = 1.5
 
 
 def get_api_key() -> str:
@@ -35,11 +45,30 @@ def get_api_key() -> str:
     return None
 
 
-def upload_file(base_url: str, api_key: str, file_path: str) -> str:
+def make_session(api_key: str) -> requests.Session:
+    """Create a keep-alive HTTP session for the Reducto API.
+
+    Sends the auth header on every request and retries 502/503/504 responses
+    with exponential backoff. Status retries only apply to urllib3's
+    idempotent methods, so a parse job POST is never submitted twice.
+    """
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {api_key}"})
+    retry = Retry(total=5, backoff_factor=1, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def upload_file(
+    base_url: str, api_key: str, file_path: str, session: requests.Session | None = None
+) -> str:
     """Upload file and get reducto:// URL."""
+    http = session or requests
     with open(file_path, "rb") as f:
         files = {"file": (Path(file_path).name, f)}
-        resp = requests.post(
+        resp = http.post(
             f"{base_url}/upload",
             headers={"Authorization": f"Bearer {api_key}"},
             files=files,
@@ -54,16 +83,22 @@ def upload_file(base_url: str, api_key: str, file_path: str) -> str:
 
 
 def parse_and_get_raw_result(base_url: str, api_key: str, file_path: str) -> dict:
-    """Upload, parse, poll, and return the complete raw JSON response."""
-    headers_json = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    headers_auth = {"Authorization": f"Bearer {api_key}"}
+    """Upload, parse, poll, and return the complete raw JSON response.
+
+    All requests for the file share one session, so polling reuses the same
+    connection instead of opening a new TLS connection every time.
+    """
+    with make_session(api_key) as session:
+        return _parse_with_session(session, base_url, api_key, file_path)
+
 
+def _parse_with_session(
+    session: requests.Session, base_url: str, api_key: str, file_path: str
+) -> dict:
+    """Body of parse_and_get_raw_result(), using an open session."""
     # 1. Upload
     print(f"Uploading {file_path}...")
-    file_url = upload_file(base_url, api_key, file_path)
+    file_url = upload_file(base_url, api_key, file_path, session)
     print(f"Uploaded: {file_url}")
 
     # 2. Submit parse job (same settings as parse_reducto.py)
@@ -86,16 +121,20 @@ def parse_and_get_raw_result(base_url: str, api_key: str, file_path: str) -> dic
     }
 
     print("Submitting parse job...")
-    resp = requests.post(f"{base_url}/parse_async", headers=headers_json, json=payload)
+    resp = session.post(f"{base_url}/parse_async", json=payload)
     resp.raise_for_status()
     job_id = resp.json()["job_id"]
     print(f"Job ID: {job_id}")
 
-    # 3. Poll until complete
+    # 3. Poll until complete, backing off so short jobs return quickly and
+    # long ones don't hammer the API
+    delay = POLL_INITIAL_DELAY
+    last_state = None
     while True:
-        resp = requests.get(f"{base_url}/job/{job_id}", headers=headers_auth)
+        resp = session.get(f"{base_url}/job/{job_id}")
         resp.raise_for_status()
-        job_result = resp.json()
+        # The completed job carries the whole parse result inline
+        job_result = parse_json(resp.content)
         status = job_result.get("status")
 
         if status == "Completed":
@@ -107,11 +146,14 @@ def parse_and_get_raw_result(base_url: str, api_key: str, file_path: str) -> dic
             sys.exit(1)
         else:
             progress = job_result.get("progress")
-            if progress:
-                print(f"Status: {status} ({progress}%)...")
-            else:
-                print(f"Status: {status}...")
-            time.sleep(5)
+            if (status, progress) != last_state:
+                last_state = (status, progress)
+                if progress:
+                    print(f"Status: {status} ({progress}%)...")
+                else:
+                    print(f"Status: {status}...")
+            time.sleep(delay)
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
 
     # 4. Extract the full result, handling URL result type
     parse_result = job_result.get("result", {})
@@ -119,9 +161,10 @@ def parse_and_get_raw_result(base_url: str, api_key: str, file_path: str) -> dic
     if parse_result.get("result", {}).get("type") == "url":
         url = parse_result["result"]["url"]
         print(f"Downloading result from {url}...")
-        download_resp = requests.get(url)
+        # Result URLs are pre-signed; don't send the API key along
+        download_resp = session.get(url, headers={"Authorization": None})
         download_resp.raise_for_status()
-        parse_result = download_resp.json()
+        parse_result = parse_json(download_resp.content)
 
     return parse_result
 
@@ -166,8 +209,7 @@ def main():
 
     # Save full raw JSON
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(raw_result, f, indent=2)
+    write_json(output_path, raw_result)
     print(f"Saved raw JSON to {output_path}")
 
     # Print summary info